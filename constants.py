@@ -1,3 +1,10 @@
+__all__ = [
+    "DESCRIBE_PROMPT",
+    "AUDIO_DESCRIPTIONS_PROMPT",
+    "CATEGORY_STEP_SCALE",
+    "DEFAULT_CATEGORY",
+]
+
 DESCRIBE_PROMPT = """
 Analyze this image in detail and provide a comprehensive description. Focus on the following elements:
 
@@ -12,4 +19,27 @@ Mood & Atmosphere: Describe the emotional tone and atmosphere conveyed by the im
 Setting & Context: Describe the environment or setting (e.g., urban, natural, indoor, outdoor, futuristic).
 
 Output: Provide a detailed, objective description of the image in English, covering all the elements mentioned above.
-"""
\ No newline at end of file
+"""
+
+# Formatted with vision_analysis and num_descriptions. Output shape (count,
+# fields, category values) is enforced by the structured-output schema, so
+# the prompt only carries the creative brief.
+AUDIO_DESCRIPTIONS_PROMPT = """Image analysis:
+{vision_analysis}
+
+Write {num_descriptions} distinct sound design samples matching the image's mood, colors and atmosphere, each from a different sub-type below, all in one musical scale (e.g. C-minor).
+Loops: sustained harmonic cluster drone (4 bars); single-note root drone (4 bars); emotional piano phrase (4 bars); granular texture from field recordings (2 bars); organic noise - wind, friction, water, resonant metal (2 bars); spatial ambiance - pink noise, synthetic wind, HF halos (2 bars); microtextures across the spectrum - shimmers, crackles, sparkles (1 bar); deep sub-bass layer (2 bars); textured pad - granular, analog, modular (2 bars).
+Rhythmic loops (1 bar): soft clicks or glitch ticks; low-frequency pulses; slow modular shakers or grain sequences.
+One-shots (1/2 bar): soft impact - wood, light metal, reverberant hit; abstract percussive strike; atmospheric pluck without sharp transient.
+Each description is one vivid, non-technical, musically usable sentence. Category: "one-shot" for one-shots, "drone" for drones, pads and sub-bass, "loop" otherwise."""
+
+# Share of the pack's diffusion steps spent on each sample category. Short,
+# simple one-shots converge in far fewer steps than sustained drones.
+CATEGORY_STEP_SCALE = {
+    "one-shot": 0.4,
+    "loop": 0.7,
+    "drone": 1.0,
+}
+
+# Category assumed when the text model does not provide a valid one
+DEFAULT_CATEGORY = "loop"
@@ -0,0 +1,41 @@
+import { NextRequest, NextResponse } from "next/server";
+
+const backendUrl = process.env.BACKEND_URL || "http://localhost:8000";
+
+// GET /api/sample/[jobId]/stream - Stream job status as server-sent events
+export async function GET(
+  request: NextRequest,
+  { params }: { params: Promise<{ jobId: string }> }
+) {
+  try {
+    const { jobId } = await params;
+
+    const response = await fetch(`${backendUrl}/sample/${jobId}/stream`, {
+      method: "GET",
+      signal: request.signal,
+    });
+
+    if (!response.ok || !response.body) {
+      const errorData = await response.json();
+      return NextResponse.json(
+        { error: errorData.detail || "Failed to stream job status" },
+        { status: response.status }
+      );
+    }
+
+    // Pipe the event stream through without buffering it
+    return new Response(response.body, {
+      headers: {
+        "Content-Type": "text/event-stream",
+        "Cache-Control": "no-cache",
+        Connection: "keep-alive",
+      },
+    });
+  } catch (error) {
+    console.error("Error streaming job status:", error);
+    return NextResponse.json(
+      { error: "Failed to connect to backend" },
+      { status: 500 }
+    );
+  }
+}
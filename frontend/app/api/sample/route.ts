@@ -5,14 +5,12 @@ const backendUrl = process.env.BACKEND_URL || "http://localhost:8000";
 // POST /api/sample - Create a new job
 export async function POST(request: NextRequest) {
   try {
-    const body = await request.json();
+    // Forward the multipart upload as-is; fetch sets the boundary header
+    const formData = await request.formData();
 
     const response = await fetch(`${backendUrl}/sample`, {
       method: "POST",
-      headers: {
-        "Content-Type": "application/json",
-      },
-      body: JSON.stringify(body),
+      body: formData,
     });
 
     const data = await response.json();
@@ -56,92 +56,103 @@ export default function Home() {
   // Store current image for saving to cache after completion
   const currentImageRef = useRef<string | null>(null);
 
-  const pollJobStatus = useCallback(
-    async (jobId: string): Promise<void> => {
-      const pollInterval = 2000; // Poll every 2 seconds
+  const watchJobStatus = useCallback(
+    (jobId: string): Promise<void> =>
+      new Promise<void>((resolve) => {
+        // The backend pushes every status change as a server-sent event
+        const events = new EventSource(`/api/sample/${jobId}/stream`);
+
+        const fail = (err: unknown) => {
+          events.close();
+          setError(err instanceof Error ? err.message : "An error occurred");
+          setIsLoading(false);
+          setLoadingMessage("");
+          setProgress(0);
+          resolve();
+        };
 
-      const poll = async (): Promise<void> => {
-        try {
-          const response = await fetch(`/api/sample/${jobId}`);
-          const status = await response.json();
+        events.onmessage = async (event) => {
+          try {
+            const status = JSON.parse(event.data);
 
-          if (!response.ok) {
-            throw new Error(status.error || "Failed to get job status");
-          }
+            // Update progress based on backend status
+            setProgress(status.progress);
+            setLoadingMessage(status.current_step);
 
-          // Update progress based on backend status
-          setProgress(status.progress);
-          setLoadingMessage(status.current_step);
+            if (status.status === "completed") {
+              // The stream ends here; don't let EventSource reconnect
+              events.close();
 
-          if (status.status === "completed") {
-            // Download the ZIP file
-            setLoadingMessage("Downloading sample pack...");
-            const downloadResponse = await fetch(
-              `/api/sample/${jobId}/download`
-            );
+              // Download the ZIP file
+              setLoadingMessage("Downloading sample pack...");
+              const downloadResponse = await fetch(
+                `/api/sample/${jobId}/download`
+              );
 
-            if (!downloadResponse.ok) {
-              throw new Error("Failed to download sample pack");
-            }
+              if (!downloadResponse.ok) {
+                throw new Error("Failed to download sample pack");
+              }
 
-            const zipBlob = await downloadResponse.blob();
-            const zip = await JSZip.loadAsync(zipBlob);
+              const zipBlob = await downloadResponse.blob();
+              const zip = await JSZip.loadAsync(zipBlob);
 
-            const metadataFile = zip.file("metadata.json");
-            if (!metadataFile) {
-              throw new Error("Invalid response: missing metadata");
-            }
+              const metadataFile = zip.file("metadata.json");
+              if (!metadataFile) {
+                throw new Error("Invalid response: missing metadata");
+              }
 
-            const metadataText = await metadataFile.async("text");
-            const metadata = JSON.parse(metadataText);
-
-            const audioSamples: AudioSample[] = [];
-            for (const sample of metadata.samples) {
-              const audioFile = zip.file(sample.filename);
-              if (audioFile) {
-                const audioBlob = await audioFile.async("blob");
-                const audioUrl = URL.createObjectURL(audioBlob);
-                audioSamples.push({
-                  filename: sample.filename,
-                  description: sample.description,
-                  audioUrl,
-                });
+              const metadataText = await metadataFile.async("text");
+              const metadata = JSON.parse(metadataText);
+
+              const audioSamples: AudioSample[] = [];
+              for (const sample of metadata.samples) {
+                const audioFile = zip.file(sample.filename);
+                if (audioFile) {
+                  const audioBlob = await audioFile.async("blob");
+                  const audioUrl = URL.createObjectURL(audioBlob);
+                  audioSamples.push({
+                    filename: sample.filename,
+                    description: sample.description,
+                    audioUrl,
+                  });
+                }
               }
-            }
 
-            setProgress(100);
-            setSamples(audioSamples);
-            setIsLoading(false);
-            setLoadingMessage("");
-
-            // Save to history cache (with server sync)
-            if (currentImageRef.current) {
-              try {
-                await historyCache.saveEntryWithSync(
-                  currentImageRef.current,
-                  audioSamples
-                );
-                setHistoryCount((prev) => prev + 1);
-              } catch (cacheErr) {
-                console.error("Failed to save to history:", cacheErr);
+              setProgress(100);
+              setSamples(audioSamples);
+              setIsLoading(false);
+              setLoadingMessage("");
+
+              // Save to history cache (with server sync)
+              if (currentImageRef.current) {
+                try {
+                  await historyCache.saveEntryWithSync(
+                    currentImageRef.current,
+                    audioSamples
+                  );
+                  setHistoryCount((prev) => prev + 1);
+                } catch (cacheErr) {
+                  console.error("Failed to save to history:", cacheErr);
+                }
               }
+
+              resolve();
+            } else if (status.status === "failed") {
+              throw new Error(status.error || "Job failed");
             }
-          } else if (status.status === "failed") {
-            throw new Error(status.error || "Job failed");
-          } else {
-            // Continue polling
-            setTimeout(poll, pollInterval);
+          } catch (err) {
+            fail(err);
           }
-        } catch (err) {
-          setError(err instanceof Error ? err.message : "An error occurred");
-          setIsLoading(false);
-          setLoadingMessage("");
-          setProgress(0);
-        }
-      };
+        };
 
-      await poll();
-    },
+        events.onerror = () => {
+          // Dropped connections are retried by EventSource itself; give up
+          // only once it has closed (e.g. the job is unknown)
+          if (events.readyState === EventSource.CLOSED) {
+            fail(new Error("Lost connection to job status stream"));
+          }
+        };
+      }),
     []
   );
 
@@ -161,20 +172,18 @@ export default function Home() {
         setImagePreview(base64Full);
         currentImageRef.current = base64Full;
 
-        const base64Data = base64Full.split(",")[1];
-
         setIsLoading(true);
         setLoadingMessage("Starting generation...");
         setProgress(0);
 
         try {
-          // Create job
+          // Create job, uploading the raw file rather than base64
+          const formData = new FormData();
+          formData.append("file", file);
+
           const response = await fetch("/api/sample", {
             method: "POST",
-            headers: {
-              "Content-Type": "application/json",
-            },
-            body: JSON.stringify({ image_base64: base64Data }),
+            body: formData,
           });
 
           const data = await response.json();
@@ -183,9 +192,9 @@ export default function Home() {
             throw new Error(data.error || "Failed to start generation");
           }
 
-          // Start polling for status
+          // Follow the job's status stream
           setLoadingMessage("Job started, waiting for progress...");
-          await pollJobStatus(data.job_id);
+          await watchJobStatus(data.job_id);
         } catch (err) {
           setError(err instanceof Error ? err.message : "An error occurred");
           setIsLoading(false);
@@ -196,7 +205,7 @@ export default function Home() {
 
       reader.readAsDataURL(file);
     },
-    [pollJobStatus]
+    [watchJobStatus]
   );
 
   // Handle loading entry from history
@@ -1,24 +1,501 @@
+import contextlib
+import logging
+import math
+import multiprocessing
 import os
-import tempfile
-from typing import List, Tuple
+import struct
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import groupby
+from typing import Callable, List, Optional, Tuple, Union
 
-import torchaudio
+import numpy as np
+import soundfile
+import torch
 from tangoflux import TangoFluxInference
+from tangoflux.model import retrieve_timesteps
+
+logger = logging.getLogger(__name__)
+
+
+# Rough VRAM needed per prompt in a batch (classifier-free guidance doubles
+# the rows fed to the transformer). Used to size batches from free memory.
+BATCH_ITEM_BYTES = 512 * 1024 * 1024
+
+# With a compiled transformer, sub-batches are padded up to one of these
+# sizes so only a handful of shapes are ever compiled (well under dynamo's
+# cache_size_limit of 8). All are warmed up at startup.
+SAMPLER_BATCH_SIZES = (1, 2, 4, 8)
+
+# Let the CUDA caching allocator grow segments in place instead of carving
+# new ones per batch shape; read when CUDA is first initialized
+os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True")
+
+# RIFF/WAVE header for 16-bit PCM: RIFF chunk, "fmt " chunk, "data" chunk header
+WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+
+PRECISION_DTYPES = {
+    "fp32": torch.float32,
+    "bf16": torch.bfloat16,
+    "fp16": torch.float16,
+}
+
+
+def _wav_header(frames: int, channels: int, sample_rate: int) -> bytes:
+    """Build the 44-byte header of a 16-bit PCM WAV with `frames` frames."""
+    block_align = channels * 2
+    data_size = frames * block_align
+    return WAV_HEADER.pack(
+        b"RIFF", WAV_HEADER.size - 8 + data_size, b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate, sample_rate * block_align, block_align, 16,
+        b"data", data_size,
+    )
+
+
+def _padded_batch_size(rows: int) -> int:
+    """Smallest of SAMPLER_BATCH_SIZES that holds `rows` prompts."""
+    return next(size for size in SAMPLER_BATCH_SIZES if size >= rows)
+
+
+class BatchedTangoFluxInference(TangoFluxInference):
+    """TangoFlux inference that samples several prompts in a single pass."""
+
+    # When set, prompts are padded/truncated to this many tokens so every
+    # transformer call sees the same shapes (needed for CUDA graph reuse)
+    fixed_text_len: Optional[int] = None
+
+    # Initial-noise buffer reused across sampler runs, see _noise()
+    _noise_buffer: Optional[torch.Tensor] = None
+
+    def _noise(self, batch: int, device: torch.device) -> torch.Tensor:
+        """
+        Fill and return a (batch, audio_seq_len, 64) slice of a persistent
+        noise buffer, regrown only when a larger batch is requested.
+
+        Safe to reuse: the sampler's first step produces fresh latents, and
+        later runs overwrite the buffer in stream order.
+        """
+        buffer = self._noise_buffer
+        if buffer is None or buffer.shape[0] < batch or buffer.device != device:
+            buffer = torch.empty(batch, self.model.audio_seq_len, 64, device=device)
+            self._noise_buffer = buffer
+
+        # In-place standard normal, same distribution as torch.randn
+        return buffer[:batch].normal_()
+
+    def _encode_prompts(self, prompts: List[str], guidance_scale: float):
+        """
+        Encode a batch of prompts for the flow-matching transformer.
+
+        Args:
+            prompts: Text descriptions to encode
+            guidance_scale: Classifier-free guidance scale
+
+        Returns:
+            Tuple (encoder_hidden_states, pooled_projection)
+        """
+        model = self.model
+        device = model.text_encoder.device
+
+        if self.fixed_text_len is not None:
+            max_length, padding = self.fixed_text_len, "max_length"
+        else:
+            max_length, padding = model.tokenizer.model_max_length, True
+
+        batch = model.tokenizer(
+            prompts,
+            max_length=max_length,
+            padding=padding,
+            truncation=True,
+            return_tensors="pt",
+        )
+        input_ids = batch.input_ids.to(device)
+        attention_mask = batch.attention_mask.to(device)
+        # T5 overflows in fp16, so it runs in fp32 even when called under
+        # the sampler's autocast
+        with torch.autocast(device_type=device.type, enabled=False):
+            prompt_embeds = model.text_encoder(
+                input_ids=input_ids, attention_mask=attention_mask
+            )[0]
+
+        if guidance_scale > 1.0:
+            # One unconditional embedding, repeated once per prompt so the
+            # uncond/cond halves of the batch line up row by row.
+            uncond_batch = model.tokenizer(
+                [""],
+                max_length=prompt_embeds.shape[1],
+                padding="max_length",
+                truncation=True,
+                return_tensors="pt",
+            )
+            uncond_input_ids = uncond_batch.input_ids.to(device)
+            uncond_attention_mask = uncond_batch.attention_mask.to(device)
+            with torch.autocast(device_type=device.type, enabled=False):
+                negative_embeds = model.text_encoder(
+                    input_ids=uncond_input_ids, attention_mask=uncond_attention_mask
+                )[0]
+
+            rows = len(prompts)
+            prompt_embeds = torch.cat(
+                [negative_embeds.expand(rows, -1, -1), prompt_embeds]
+            )
+            attention_mask = torch.cat(
+                [uncond_attention_mask.expand(rows, -1), attention_mask]
+            )
+
+        boolean_mask = attention_mask == 1
+        masked = torch.where(
+            boolean_mask.unsqueeze(-1).expand_as(prompt_embeds),
+            prompt_embeds,
+            torch.tensor(float("nan"), device=device),
+        )
+        pooled_projection = model.fc(torch.nanmean(masked, dim=1))
+
+        return prompt_embeds, pooled_projection
+
+    @torch.inference_mode()
+    def generate_batch(
+        self,
+        prompts: List[str],
+        steps: int = 25,
+        duration: int = 10,
+        guidance_scale: float = 4.5,
+        out: Optional[torch.Tensor] = None,
+    ) -> torch.Tensor:
+        """
+        Generate audio for several prompts with one sampler run.
+
+        Every denoising step feeds the whole batch through the transformer,
+        so the per-step overhead is paid once instead of once per prompt.
+
+        Args:
+            prompts: Text descriptions of the audio to generate
+            steps: Number of denoising steps
+            duration: Duration of audio in seconds
+            guidance_scale: Classifier-free guidance scale
+            out: Optional (batch, channels, samples) CPU tensor the decoded
+                waveforms are copied into instead of a new allocation
+
+        Returns:
+            Audio tensor of shape (batch, channels, samples) on the CPU
+        """
+        latents = self.sample_latents(prompts, steps, duration, guidance_scale)
+        return self.decode_latents(latents, duration, out)
+
+    @torch.inference_mode()
+    def sample_latents(
+        self,
+        prompts: List[str],
+        steps: int = 25,
+        duration: int = 10,
+        guidance_scale: float = 4.5,
+        step_callback: Optional[Callable[[], None]] = None,
+    ) -> torch.Tensor:
+        """
+        Run the flow-matching sampler for a batch of prompts.
+
+        Args:
+            prompts: Text descriptions of the audio to generate
+            steps: Number of denoising steps
+            duration: Duration of audio in seconds
+            guidance_scale: Classifier-free guidance scale
+            step_callback: Called after each denoising step
+
+        Returns:
+            Latents of shape (batch, audio_seq_len, 64) on the model device
+        """
+        model = self.model
+        device = model.transformer.device
+        scheduler = model.noise_scheduler
+        classifier_free_guidance = guidance_scale > 1.0
+
+        encoder_hidden_states, pooled_projection = self._encode_prompts(
+            prompts, guidance_scale
+        )
+        rows = encoder_hidden_states.shape[0]
+
+        duration_hidden_states = model.encode_duration(
+            torch.tensor([duration], device=device)
+        ).repeat(rows, 1, 1)
+        encoder_hidden_states = torch.cat(
+            [encoder_hidden_states, duration_hidden_states], dim=1
+        )
+
+        sigmas = np.linspace(1.0, 1 / steps, steps)
+        timesteps, _ = retrieve_timesteps(scheduler, steps, device, None, sigmas)
+
+        latents = self._noise(len(prompts), device)
+        txt_ids = torch.zeros(rows, encoder_hidden_states.shape[1], 3, device=device)
+        audio_ids = (
+            torch.arange(model.audio_seq_len, device=device)
+            .unsqueeze(0)
+            .unsqueeze(-1)
+            .repeat(rows, 1, 3)
+        )
+
+        for t in timesteps:
+            latents_input = (
+                torch.cat([latents] * 2) if classifier_free_guidance else latents
+            )
+
+            noise_pred = model.transformer(
+                hidden_states=latents_input,
+                timestep=torch.tensor([t / 1000], device=device),
+                guidance=None,
+                pooled_projections=pooled_projection,
+                encoder_hidden_states=encoder_hidden_states,
+                txt_ids=txt_ids,
+                img_ids=audio_ids,
+                return_dict=False,
+            )[0]
+
+            if classifier_free_guidance:
+                noise_pred_uncond, noise_pred_text = noise_pred.chunk(2)
+                noise_pred = noise_pred_uncond + guidance_scale * (
+                    noise_pred_text - noise_pred_uncond
+                )
+
+            latents = scheduler.step(noise_pred, t, latents).prev_sample
+
+            if step_callback is not None:
+                step_callback()
+
+        return latents
+
+    @torch.inference_mode()
+    def decode_latents(
+        self,
+        latents: torch.Tensor,
+        duration: int = 10,
+        out: Optional[torch.Tensor] = None,
+        non_blocking: bool = False,
+    ) -> torch.Tensor:
+        """
+        Decode sampled latents to waveforms with the VAE.
+
+        Args:
+            latents: Latents returned by sample_latents()
+            duration: Duration of audio in seconds
+            out: Optional (batch, channels, samples) CPU tensor the decoded
+                waveforms are copied into instead of a new allocation
+            non_blocking: Queue the copy into a pinned `out` asynchronously;
+                the caller must synchronize the stream before reading it
+
+        Returns:
+            Audio tensor of shape (batch, channels, samples) on the CPU
+        """
+        wave = self.vae.decode(latents.transpose(2, 1)).sample
+        waveform_end = int(duration * self.vae.config.sampling_rate)
+        wave = wave[:, :, :waveform_end]
+
+        if out is None:
+            return wave.float().cpu()
+
+        # Device transfer and dtype cast in a single copy into the caller's buffer
+        return out.copy_(wave, non_blocking=non_blocking)
 
 
 class AudioGenerator:
     """Handles audio generation using TangoFlux model."""
 
-    def __init__(self):
-        """Initialize the TangoFlux model."""
+    def __init__(
+        self,
+        precision: str = "bf16",
+        compile_model: bool = True,
+        multi_gpu: bool = True
+    ):
+        """
+        Initialize the TangoFlux model.
+
+        Args:
+            precision: Inference precision, one of "fp32", "bf16" or "fp16".
+                "bf16" falls back to "fp16" on GPUs without bfloat16 support.
+            compile_model: Compile the flow transformer with torch.compile
+                (CUDA only)
+            multi_gpu: With more than one visible GPU, load one model replica
+                per GPU in a worker process and shard generation across them
+        """
+        if precision not in PRECISION_DTYPES:
+            raise ValueError(
+                f"Unknown precision '{precision}', expected one of {list(PRECISION_DTYPES)}"
+            )
+
         self.model = None
+        self.precision = precision
+        self.compile_model = compile_model
+        self.multi_gpu = multi_gpu
+        self._sampler_warmed_up = False
+
+        # One single-process pool per GPU when running data-parallel
+        self._workers: List[ProcessPoolExecutor] = []
+
+        # VAE decode of one batch overlaps sampling of the next (CUDA only)
+        self._decode_executor: Optional[ThreadPoolExecutor] = None
+        self._decode_stream: Optional["torch.cuda.Stream"] = None
 
-    def load_model(self):
-        """Load the TangoFlux model."""
-        if self.model is None:
-            print("Loading TangoFlux model...")
-            self.model = TangoFluxInference(name="declare-lab/TangoFlux")
-            print("TangoFlux model loaded successfully!")
+        # Reused across generate_audio_batch calls, see _output_buffer()
+        self._out_buffer: Optional[torch.Tensor] = None
+        # Per-thread float/int16 scratch for WAV encoding, see _to_pcm16()
+        self._scratch = threading.local()
+
+    @property
+    def dtype(self) -> torch.dtype:
+        """Dtype used for the transformer and VAE weights."""
+        if not torch.cuda.is_available():
+            return torch.float32
+        if self.precision == "bf16" and not torch.cuda.is_bf16_supported():
+            # Pre-Ampere GPUs have no bfloat16 tensor cores
+            return torch.float16
+        return PRECISION_DTYPES[self.precision]
+
+    def _autocast(self):
+        """Autocast context for reduced-precision inference (no-op for fp32)."""
+        if self.dtype == torch.float32:
+            return contextlib.nullcontext()
+        return torch.autocast(device_type="cuda", dtype=self.dtype)
+
+    def release_cached_memory(self):
+        """
+        Return cached, unused GPU blocks to the driver. Meant for idle
+        periods: the next batch pays to allocate them again.
+        """
+        if self._workers:
+            for future in [worker.submit(_worker_release_cached_memory) for worker in self._workers]:
+                future.result()
+        elif torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def _check_loaded(self):
+        """Raise if neither a local model nor GPU workers are loaded."""
+        if self.model is None and not self._workers:
+            raise RuntimeError("Model not loaded. Call load_model() first.")
+
+    def load_model(self, gpu: Optional[int] = None):
+        """
+        Load the TangoFlux model (one replica per GPU with multi_gpu).
+
+        Args:
+            gpu: CUDA device index to load onto; made the current device so
+                streams, events and memory queries also target it
+        """
+        if self.model is not None or self._workers:
+            return
+
+        num_gpus = torch.cuda.device_count() if self.multi_gpu else 0
+        if num_gpus > 1:
+            self._start_workers(num_gpus)
+            return
+
+        logger.info("Loading TangoFlux model...")
+        if gpu is None:
+            self.model = BatchedTangoFluxInference(name="declare-lab/TangoFlux")
+        else:
+            torch.cuda.set_device(gpu)
+            self.model = BatchedTangoFluxInference(
+                name="declare-lab/TangoFlux", device=f"cuda:{gpu}"
+            )
+
+        if self.dtype != torch.float32:
+            # The T5 text encoder stays in fp32 (and runs outside autocast in
+            # _encode_prompts): it overflows in fp16 and is a small share of
+            # the compute next to the transformer.
+            self.model.model.transformer.to(dtype=self.dtype)
+            self.model.vae.to(dtype=self.dtype)
+
+        if self.compile_model and torch.cuda.is_available():
+            # Prompts are padded to a fixed length and sub-batches to one of
+            # SAMPLER_BATCH_SIZES, so "reduce-overhead" captures one CUDA
+            # graph per padded size (all warmed up) and never recompiles
+            # mid-request or hits the dynamo cache limit.
+            tango = self.model.model
+            tango.transformer = torch.compile(
+                tango.transformer,
+                mode="reduce-overhead",
+                fullgraph=False,
+                dynamic=False,
+            )
+            self.model.fixed_text_len = tango.max_text_seq_len
+
+        if torch.cuda.is_available():
+            self._decode_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="tangoflux-decode"
+            )
+            self._decode_stream = torch.cuda.Stream()
+
+        logger.info("TangoFlux model loaded successfully (%s)!", self.precision)
+
+    def _start_workers(self, num_gpus: int):
+        """
+        Spawn one worker process per GPU, each holding its own TangoFlux.
+
+        Each worker loads onto its own device index, so replicas run
+        independently without cross-GPU communication.
+        """
+        logger.info("Loading TangoFlux on %d GPUs...", num_gpus)
+        context = multiprocessing.get_context("spawn")
+
+        self._workers = [
+            ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=context,
+                initializer=_worker_init,
+                initargs=(gpu, self.precision, self.compile_model),
+            )
+            for gpu in range(num_gpus)
+        ]
+
+        # Block until every replica has loaded
+        for future in [worker.submit(_worker_ready) for worker in self._workers]:
+            future.result()
+
+        logger.info("TangoFlux model loaded on %d GPUs (%s)!", num_gpus, self.precision)
+
+    def close(self):
+        """Shut down GPU worker processes and the decode thread, if any."""
+        for worker in self._workers:
+            worker.shutdown(cancel_futures=True)
+        self._workers = []
+
+        if self._decode_executor is not None:
+            self._decode_executor.shutdown()
+            self._decode_executor = None
+
+    @property
+    def _pad_batches(self) -> bool:
+        """Whether sub-batches are padded to SAMPLER_BATCH_SIZES."""
+        # fixed_text_len is set exactly when the transformer is compiled,
+        # i.e. when every new shape is expensive
+        return self.model.fixed_text_len is not None
+
+    def warmup_sampler(self):
+        """
+        Run short throwaway generations so CUDA kernels are initialized (and
+        the compiled transformer captured for every padded batch size that
+        fits in memory) before the first real sample. Only the first call
+        does any work.
+        """
+        self._check_loaded()
+
+        if self._sampler_warmed_up:
+            return
+
+        if self._workers:
+            futures = [worker.submit(_worker_warmup) for worker in self._workers]
+            for future in futures:
+                future.result()
+            self._sampler_warmed_up = True
+            return
+
+        sizes = [1]
+        if self._pad_batches:
+            max_batch = self._auto_batch_size(max(SAMPLER_BATCH_SIZES))
+            sizes = [size for size in SAMPLER_BATCH_SIZES if size <= max_batch]
+
+        for size in sizes:
+            logger.info("Warming up TangoFlux sampler (batch of %d)...", size)
+            with self._autocast():
+                self.model.generate_batch(["warmup"] * size, steps=2, duration=10)
+        self._sampler_warmed_up = True
 
     def generate_audio(
         self,
@@ -37,61 +514,350 @@ class AudioGenerator:
         Returns:
             Generated audio tensor
         """
-        if self.model is None:
-            raise RuntimeError("Model not loaded. Call load_model() first.")
+        # Goes through the batched sampler so it reuses the warmed-up
+        # batch-of-1 shape; copy out of the reused output buffer
+        return self.generate_audio_batch([description], steps, duration)[0].clone()
+
+    def _auto_batch_size(self, total: int) -> int:
+        """
+        Pick how many prompts fit in one batch from the free GPU memory.
+
+        Args:
+            total: Number of prompts waiting to be generated
+
+        Returns:
+            Batch size between 1 and total, rounded down to one of
+            SAMPLER_BATCH_SIZES when batches are padded
+        """
+        if not torch.cuda.is_available():
+            return total
+
+        free_bytes, _ = torch.cuda.mem_get_info()
+        # Blocks held by the caching allocator are reusable by this process
+        free_bytes += torch.cuda.memory_reserved() - torch.cuda.memory_allocated()
+        batch_size = max(1, min(total, free_bytes // BATCH_ITEM_BYTES))
+
+        if self._pad_batches:
+            batch_size = max(size for size in SAMPLER_BATCH_SIZES if size <= batch_size)
+        return batch_size
+
+    def _output_buffer(self, rows: int, duration: int) -> torch.Tensor:
+        """
+        Return a float32 CPU buffer for `rows` waveforms of `duration` seconds.
+
+        The buffer is allocated once and only regrown when a larger pack or a
+        different duration is requested. On CUDA it is pinned, so the decode
+        stream can copy into it asynchronously at full bandwidth.
+        """
+        vae_config = self.model.vae.config
+        shape = (vae_config.audio_channels, int(duration * vae_config.sampling_rate))
+
+        buffer = self._out_buffer
+        if buffer is None or buffer.shape[0] < rows or buffer.shape[1:] != shape:
+            buffer = torch.empty(
+                (rows, *shape), dtype=torch.float32, pin_memory=torch.cuda.is_available()
+            )
+            self._out_buffer = buffer
+
+        return buffer[:rows]
+
+    def generate_audio_batch(
+        self,
+        descriptions: List[str],
+        steps: Union[int, List[int]] = 50,
+        duration: int = 10,
+        batch_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        sample_callback: Optional[Callable[[int, torch.Tensor], None]] = None
+    ) -> List[torch.Tensor]:
+        """
+        Generate audio for several descriptions, batching them on the GPU.
+
+        Descriptions sharing a step count are bucketed together, and each
+        bucket is split into sub-batches of at most batch_size prompts. With a
+        compiled transformer, each sub-batch is padded up to one of
+        SAMPLER_BATCH_SIZES so no new shapes are compiled mid-request.
+
+        Args:
+            descriptions: List of text descriptions
+            steps: Number of generation steps, for all samples or per sample
+            duration: Duration of each audio in seconds
+            batch_size: Prompts per sampler run (sized from free VRAM if None)
+            progress_callback: Called as (done, total) in sample-steps, i.e.
+                one unit per denoising step of each sample. Runs on the
+                calling thread.
+            sample_callback: Called as (index, audio_tensor) as soon as a
+                description's waveform is decoded, while later sub-batches
+                are still sampling, so it can be encoded early. Runs on the
+                calling thread.
+
+        Returns:
+            List of audio tensors, one per description. They are views into a
+            buffer reused by the next call, so encode or copy them first.
+        """
+        self._check_loaded()
+
+        if not descriptions:
+            return []
+
+        if isinstance(steps, int):
+            steps = [steps] * len(descriptions)
+
+        if self._workers:
+            return self._generate_on_workers(
+                descriptions, steps, duration, batch_size, progress_callback, sample_callback
+            )
+
+        total_steps = sum(steps)
+        done_steps = 0
+
+        if batch_size is None:
+            batch_size = self._auto_batch_size(len(descriptions))
+        elif self._pad_batches:
+            batch_size = max(size for size in SAMPLER_BATCH_SIZES if size <= batch_size)
+
+        out = self._output_buffer(len(descriptions), duration)
+
+        # Buffer rows follow `order`, so every sub-batch writes a contiguous slice
+        order = sorted(range(len(descriptions)), key=lambda i: steps[i])
+        row = 0
+        # (future, first row, rows) per sub-batch, in submission order
+        decodes = []
+
+        def emit_decoded(wait: bool = False):
+            # Hand finished sub-batches to sample_callback, oldest first
+            while decodes and (wait or decodes[0][0].done()):
+                decode, first, rows = decodes.pop(0)
+                decode.result()
+                if sample_callback is not None:
+                    for r in range(first, first + rows):
+                        sample_callback(order[r], out[r])
+
+        for step_count, bucket in groupby(order, key=lambda i: steps[i]):
+            bucket = list(bucket)
+
+            for start in range(0, len(bucket), batch_size):
+                batch = [descriptions[i] for i in bucket[start:start + batch_size]]
+                logger.debug(
+                    "Generating samples %d-%d/%d (%d steps)",
+                    row + 1, row + len(batch), len(descriptions), step_count
+                )
+
+                def on_step(rows=len(batch)):
+                    nonlocal done_steps
+                    done_steps += rows
+                    if progress_callback is not None:
+                        progress_callback(done_steps, total_steps)
+
+                prompts = batch
+                if self._pad_batches:
+                    # Padding rows repeat the last prompt and are dropped
+                    # before decoding
+                    prompts = batch + batch[-1:] * (_padded_batch_size(len(batch)) - len(batch))
+
+                with self._autocast():
+                    latents = self.model.sample_latents(
+                        prompts,
+                        steps=step_count,
+                        duration=duration,
+                        step_callback=on_step
+                    )[:len(batch)]
+                decodes.append((
+                    self._submit_decode(latents, duration, out[row:row + len(batch)]),
+                    row,
+                    len(batch),
+                ))
+                row += len(batch)
+                emit_decoded()
 
-        return self.model.generate(
-            description,
-            steps=steps,
-            duration=duration
+        emit_decoded(wait=True)
+
+        audio = [None] * len(descriptions)
+        for row, idx in enumerate(order):
+            audio[idx] = out[row]
+
+        return audio
+
+    def _submit_decode(
+        self,
+        latents: torch.Tensor,
+        duration: int,
+        out: torch.Tensor
+    ) -> Future:
+        """
+        Decode latents into `out`, on the decode thread when CUDA is available
+        so the caller can start sampling the next batch right away.
+
+        Returns:
+            Future resolving to `out` once it holds the waveforms
+        """
+        if self._decode_executor is None:
+            future = Future()
+            with self._autocast():
+                future.set_result(self.model.decode_latents(latents, duration, out))
+            return future
+
+        # Mark where sampling of these latents ends on the current stream
+        sampled = torch.cuda.Event()
+        sampled.record()
+
+        return self._decode_executor.submit(
+            self._decode_on_stream, latents, sampled, duration, out
         )
 
+    def _decode_on_stream(
+        self,
+        latents: torch.Tensor,
+        sampled: "torch.cuda.Event",
+        duration: int,
+        out: torch.Tensor
+    ) -> torch.Tensor:
+        """Run the VAE decode on the side stream once sampling has finished."""
+        stream = self._decode_stream
+
+        # Autocast state is per thread, so enter it again here
+        with torch.cuda.stream(stream), self._autocast():
+            stream.wait_event(sampled)
+            # Keep the allocator from reusing the latents while this stream reads them
+            latents.record_stream(stream)
+            self.model.decode_latents(latents, duration, out, non_blocking=out.is_pinned())
+
+        # Only this thread waits for the device-to-host copy; sampling of the
+        # next batch keeps running on the default stream
+        stream.synchronize()
+        return out
+
+    def _generate_on_workers(
+        self,
+        descriptions: List[str],
+        steps: List[int],
+        duration: int,
+        batch_size: Optional[int],
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        sample_callback: Optional[Callable[[int, torch.Tensor], None]] = None
+    ) -> List[torch.Tensor]:
+        """
+        Split descriptions into one contiguous shard per GPU worker and
+        generate the shards in parallel. Progress and finished samples are
+        reported per shard.
+
+        Returns:
+            List of audio tensors, in the same order as descriptions
+        """
+        shard_size = math.ceil(len(descriptions) / len(self._workers))
+        futures = [
+            worker.submit(
+                _worker_generate,
+                descriptions[start:start + shard_size],
+                steps[start:start + shard_size],
+                duration,
+                batch_size,
+            )
+            for worker, start in zip(self._workers, range(0, len(descriptions), shard_size))
+        ]
+
+        audio = []
+        done_steps = 0
+        for future, start in zip(futures, range(0, len(descriptions), shard_size)):
+            shard = future.result().unbind(0)
+            audio.extend(shard)
+            if sample_callback is not None:
+                for idx, audio_tensor in enumerate(shard, start):
+                    sample_callback(idx, audio_tensor)
+            done_steps += sum(steps[start:start + shard_size])
+            if progress_callback is not None:
+                progress_callback(done_steps, sum(steps))
+
+        return audio
+
     def generate_sample_pack(
         self,
         descriptions: List[str],
-        output_dir: str = None,
         steps: int = 30,
         duration: int = 10,
-        sample_rate: int = 44100
-    ) -> List[Tuple[str, str]]:
+        sample_rate: int = 44100,
+        batch_size: Optional[int] = None,
+        steps_per_description: Optional[List[int]] = None
+    ) -> List[Tuple[bytes, str]]:
         """
         Generate multiple audio samples from descriptions.
 
         Args:
             descriptions: List of text descriptions
-            output_dir: Directory to save audio files (creates temp dir if None)
             steps: Number of generation steps per sample
             duration: Duration of each audio in seconds
             sample_rate: Audio sample rate
+            batch_size: Prompts per sampler run (sized from free VRAM if None)
+            steps_per_description: Optional step count for each description,
+                overriding steps (e.g. fewer steps for simple one-shots)
 
         Returns:
-            List of tuples (audio_path, description)
+            List of tuples (wav_bytes, description)
         """
-        if self.model is None:
-            raise RuntimeError("Model not loaded. Call load_model() first.")
+        self._check_loaded()
+
+        audio = self.generate_audio_batch(
+            descriptions,
+            steps=steps_per_description or steps,
+            duration=duration,
+            batch_size=batch_size
+        )
+
+        return [
+            (self.encode_wav(wave, sample_rate), description)
+            for description, wave in zip(descriptions, audio)
+        ]
 
-        # Create output directory if not provided
-        if output_dir is None:
-            output_dir = tempfile.mkdtemp()
+    def encode_wav(
+        self,
+        audio_tensor,
+        sample_rate: int = 44100
+    ) -> bytearray:
+        """
+        Encode an audio tensor as an in-memory 16-bit PCM WAV file.
 
-        audio_files = []
+        The header is packed directly and the samples are quantized straight
+        into the returned buffer, so there is no intermediate copy.
 
-        for idx, description in enumerate(descriptions, 1):
-            print(f"Generating sample {idx}/{len(descriptions)}: {description}")
+        Args:
+            audio_tensor: Audio tensor to encode
+            sample_rate: Audio sample rate
 
-            # Generate audio
-            audio = self.generate_audio(
-                description,
-                steps=steps,
-                duration=duration
-            )
+        Returns:
+            WAV file contents
+        """
+        channels, frames = audio_tensor.shape
+        buffer = bytearray(WAV_HEADER.size + frames * channels * 2)
+        buffer[:WAV_HEADER.size] = _wav_header(frames, channels, sample_rate)
+
+        pcm = torch.frombuffer(
+            buffer, dtype=torch.int16, offset=WAV_HEADER.size
+        ).view(frames, channels)
+        self._to_pcm16(audio_tensor, out=pcm)
 
-            # Save audio file
-            audio_path = os.path.join(output_dir, f"sample_{idx:02d}.wav")
-            torchaudio.save(audio_path, audio, sample_rate)
-            audio_files.append((audio_path, description))
+        return buffer
 
-        return audio_files
+    def _to_pcm16(self, audio_tensor, out: Optional[torch.Tensor] = None) -> np.ndarray:
+        """
+        Convert a (channels, samples) float waveform in [-1, 1] to 16-bit PCM
+        laid out as (samples, channels), the interleaved layout of WAV data.
+
+        Uses scratch buffers kept per thread, so repeated encodes of the same
+        shape do not allocate. Unless `out` (an int16 tensor of that layout)
+        is given, the result is overwritten by the next call on the same
+        thread.
+        """
+        frames = audio_tensor.T
+        scratch = self._scratch
+        if getattr(scratch, "pcm", None) is None or scratch.pcm.shape != frames.shape:
+            scratch.float = torch.empty(frames.shape, dtype=torch.float32)
+            scratch.pcm = torch.empty(frames.shape, dtype=torch.int16)
+
+        # Transpose into the contiguous scratch, then quantize in place
+        scratch.float.copy_(frames).clamp_(-1, 1).mul_(32767)
+        if out is None:
+            out = scratch.pcm
+        return out.copy_(scratch.float).numpy()
 
     def save_audio(
         self,
@@ -100,11 +866,69 @@ class AudioGenerator:
         sample_rate: int = 44100
     ):
         """
-        Save audio tensor to file.
+        Save audio tensor to a 16-bit PCM WAV file.
 
         Args:
             audio_tensor: Audio tensor to save
             output_path: Path to save the audio file
             sample_rate: Audio sample rate
         """
-        torchaudio.save(output_path, audio_tensor, sample_rate)
+        soundfile.write(
+            output_path,
+            self._to_pcm16(audio_tensor),
+            sample_rate,
+            subtype="PCM_16"
+        )
+
+
+# Per-process generator used by the multi-GPU worker processes
+_worker_generator: Optional[AudioGenerator] = None
+
+
+def _worker_init(gpu: int, precision: str, compile_model: bool):
+    """Pin a worker process to one GPU and load its TangoFlux replica."""
+    global _worker_generator
+
+    # Spawned workers don't inherit the parent's matmul settings
+    torch.backends.cuda.matmul.allow_tf32 = True
+    torch.backends.cudnn.allow_tf32 = True
+    torch.set_float32_matmul_precision("high")
+
+    _worker_generator = AudioGenerator(
+        precision=precision,
+        compile_model=compile_model,
+        multi_gpu=False
+    )
+    _worker_generator.load_model(gpu)
+
+
+def _worker_ready() -> bool:
+    """No-op used to wait until a worker has finished loading."""
+    return _worker_generator is not None
+
+
+def _worker_release_cached_memory():
+    """Empty the worker's CUDA cache."""
+    _worker_generator.release_cached_memory()
+
+
+def _worker_warmup():
+    """Warm up the worker's sampler."""
+    _worker_generator.warmup_sampler()
+
+
+def _worker_generate(
+    descriptions: List[str],
+    steps: List[int],
+    duration: int,
+    batch_size: Optional[int]
+) -> torch.Tensor:
+    """Generate a shard of descriptions on the worker's GPU."""
+    audio = _worker_generator.generate_audio_batch(
+        descriptions,
+        steps=steps,
+        duration=duration,
+        batch_size=batch_size
+    )
+    # Results are views into the worker's reusable buffer; send a copy
+    return torch.stack(audio)
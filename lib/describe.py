@@ -1,19 +1,202 @@
-import base64
+import asyncio
+import hashlib
 import json
+import logging
 import os
-import tempfile
-from typing import List
+from collections import OrderedDict
+from functools import lru_cache
+from typing import AsyncIterator, List, Optional, Tuple, Union
 
 import ollama
 
-from constants import DESCRIBE_PROMPT
+from constants import (
+    AUDIO_DESCRIPTIONS_PROMPT,
+    CATEGORY_STEP_SCALE,
+    DEFAULT_CATEGORY,
+    DESCRIBE_PROMPT,
+)
+from lib import json_utils
+
+__all__ = ["ImageAnalyzer", "image_hash"]
+
+logger = logging.getLogger(__name__)
+
+
+# Maximum number of entries kept in each analysis cache
+CACHE_SIZE = 128
+
+# How long Ollama keeps the vision and text models loaded after a request
+KEEP_ALIVE = "30m"
+
+
+def image_hash(image: Union[str, bytes]) -> str:
+    """
+    Content hash used to key the analysis caches.
+
+    Args:
+        image: Base64 encoded image or raw image bytes
+
+    Returns:
+        Hex-encoded 128-bit BLAKE2b digest
+    """
+    if isinstance(image, str):
+        image = image.encode()
+    return hashlib.blake2b(image, digest_size=16).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _descriptions_format(num_descriptions: int) -> dict:
+    """
+    Build the structured-output schema for a list of audio descriptions.
+
+    Cached because the pack size rarely changes; callers must not mutate it.
+    """
+    return {
+        "type": "object",
+        "properties": {
+            "descriptions": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "description": {
+                            "type": "string",
+                            "description": "One vivid sentence describing the sample",
+                        },
+                        "category": {
+                            "type": "string",
+                            "enum": list(CATEGORY_STEP_SCALE),
+                            "description": "Sample category, sets its diffusion steps",
+                        },
+                    },
+                    "required": ["description", "category"],
+                },
+                "minItems": num_descriptions,
+                "maxItems": num_descriptions,
+            }
+        },
+        "required": ["descriptions"],
+    }
+
+
+def _parse_sample(item) -> Tuple[str, str]:
+    """
+    Normalize one structured-output item to a (description, category) pair.
+
+    Plain strings are accepted for models that ignore the item schema.
+    """
+    if isinstance(item, str):
+        return item, DEFAULT_CATEGORY
+
+    if not isinstance(item, dict) or not isinstance(item.get("description"), str):
+        raise ValueError(f"Invalid sample entry: {item!r}")
+
+    category = item.get("category")
+    if category not in CATEGORY_STEP_SCALE:
+        category = DEFAULT_CATEGORY
+
+    return item["description"], category
+
+
+def _parse_descriptions(descriptions_text: str, num_descriptions: int) -> List[Tuple[str, str]]:
+    """
+    Parse a complete structured-output reply into (description, category) pairs.
+
+    Raises:
+        ValueError: If the reply is not valid JSON or holds the wrong count
+    """
+    try:
+        response_data = json_utils.loads(descriptions_text)
+
+        # Extract the descriptions array from the structured response
+        if isinstance(response_data, dict) and "descriptions" in response_data:
+            audio_descriptions = response_data["descriptions"]
+        elif isinstance(response_data, list):
+            # Fallback: handle if model returns raw array despite schema
+            audio_descriptions = response_data
+        else:
+            raise ValueError(
+                "Response does not contain 'descriptions' key or is not a valid structure"
+            )
+
+        # Validate it's a list
+        if not isinstance(audio_descriptions, list):
+            raise ValueError("Descriptions is not an array")
+
+        audio_descriptions = [_parse_sample(item) for item in audio_descriptions]
+
+        # The schema pins the count; anything else means a truncated reply
+        if len(audio_descriptions) != num_descriptions:
+            raise ValueError(
+                f"Expected {num_descriptions} descriptions, got {len(audio_descriptions)}"
+            )
+
+        return audio_descriptions
+
+    except (json_utils.JSONDecodeError, ValueError) as e:
+        raise ValueError(f"Failed to parse audio descriptions: {str(e)}")
+
+
+class _DescriptionStream:
+    """
+    Incrementally pull complete items out of the descriptions array of a
+    reply that is still being streamed.
+
+    Only items whose JSON is complete are returned, so a later full parse of
+    the reply always agrees with what was already handed out.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._text = ""
+        # Scan position inside the array, once its "[" has arrived
+        self._pos: Optional[int] = None
+        self._closed = False
+
+    def feed(self, text: str) -> List[Tuple[str, str]]:
+        """
+        Add a chunk of the reply.
+
+        Returns:
+            Items completed by this chunk, as (description, category) pairs
+        """
+        self._text += text
+        items = []
+
+        if self._pos is None:
+            start = self._text.find("[")
+            if start < 0:
+                return items
+            self._pos = start + 1
+
+        while not self._closed:
+            pos = self._pos
+            while pos < len(self._text) and self._text[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(self._text):
+                break
+            if self._text[pos] == "]":
+                self._closed = True
+                break
+
+            try:
+                item, self._pos = self._decoder.raw_decode(self._text, pos)
+            except json.JSONDecodeError:
+                # Item still incomplete; wait for more text
+                break
+            items.append(_parse_sample(item))
+
+        return items
 
 
 class ImageAnalyzer:
     """Handles image analysis and audio description generation using Ollama vision models."""
 
     def __init__(
-        self, vision_model: str = "llama3.2-vision", text_model: str = "llama3.2"
+        self,
+        vision_model: str = "llama3.2-vision",
+        text_model: str = "llama3.2",
+        cache_dir: Optional[str] = "cache",
     ):
         """
         Initialize the image analyzer.
@@ -21,42 +204,108 @@ class ImageAnalyzer:
         Args:
             vision_model: Ollama vision model to use for image analysis
             text_model: Ollama text model to use for generating descriptions
+            cache_dir: Directory where each image's audio descriptions are
+                persisted as {hash}.json so they survive restarts (None to
+                keep them in memory only)
         """
         self.vision_model = vision_model
         self.text_model = text_model
+        self.cache_dir = cache_dir
 
         # Configure Ollama client with host from environment
         ollama_host = os.getenv("OLLAMA_HOST", "http://localhost:11434")
-        self.client = ollama.Client(host=ollama_host)
+        # One client, so its keep-alive connection pool is reused across
+        # requests
+        self.client = ollama.AsyncClient(host=ollama_host)
+
+        # LRU caches so retried uploads skip the vision and text models
+        self._vision_cache: OrderedDict[str, str] = OrderedDict()
+        self._descriptions_cache: OrderedDict[tuple, List[Tuple[str, str]]] = OrderedDict()
+        self._image_cache: OrderedDict[tuple, List[Tuple[str, str]]] = OrderedDict()
+        self._cache_lock = asyncio.Lock()
+
+    async def _cache_get(self, cache: OrderedDict, key) -> Optional[object]:
+        """Return a cached value and mark it as recently used, or None."""
+        async with self._cache_lock:
+            if key not in cache:
+                return None
+            cache.move_to_end(key)
+            return cache[key]
+
+    async def _cache_put(self, cache: OrderedDict, key, value):
+        """Store a value, evicting the least recently used entry when full."""
+        async with self._cache_lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            if len(cache) > CACHE_SIZE:
+                cache.popitem(last=False)
+
+    async def warmup(self):
+        """
+        Load the vision and text models into Ollama ahead of the first request.
+
+        Failures are reported but not raised so the API can still start while
+        Ollama is unavailable.
+        """
+        for model in (self.vision_model, self.text_model):
+            logger.info("Warming up %s...", model)
+            try:
+                await self.client.chat(
+                    model=model,
+                    keep_alive=KEEP_ALIVE,
+                    messages=[{"role": "user", "content": "ping"}],
+                    options={"num_predict": 1},
+                )
+            except Exception as e:
+                logger.warning("Could not warm up %s: %s", model, e)
 
-    def analyze_image_from_base64(self, image_base64: str) -> str:
+    async def analyze_image_from_base64(
+        self, image_base64: str, image_key: Optional[str] = None
+    ) -> str:
         """
         Analyze an image from base64 string.
 
+        The payload is handed to Ollama as-is, which sends base64 images over
+        the wire unchanged, so no decode or temporary file is needed. Results
+        are cached by a hash of the payload.
+
         Args:
             image_base64: Base64 encoded image
+            image_key: image_hash() of the payload, if already computed
 
         Returns:
             Vision model's analysis of the image
         """
-        # Decode base64 image
-        image_data = base64.b64decode(image_base64)
+        return await self._analyze_cached(image_base64, image_key or image_hash(image_base64))
 
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as temp_image:
-            temp_image.write(image_data)
-            temp_image_path = temp_image.name
+    async def analyze_image_from_bytes(
+        self, image_bytes: bytes, image_key: Optional[str] = None
+    ) -> str:
+        """
+        Analyze an image from its raw (already decoded) bytes.
 
-        try:
-            return self.analyze_image_from_path(temp_image_path)
-        finally:
-            # Cleanup
-            import os
+        Args:
+            image_bytes: Encoded image file contents (JPEG, PNG, ...)
+            image_key: image_hash() of the bytes, if already computed
 
-            if os.path.exists(temp_image_path):
-                os.unlink(temp_image_path)
+        Returns:
+            Vision model's analysis of the image
+        """
+        return await self._analyze_cached(image_bytes, image_key or image_hash(image_bytes))
+
+    async def _analyze_cached(self, image: Union[str, bytes], key: str) -> str:
+        """Run the vision model on an image unless its analysis is cached."""
+        vision_output = await self._cache_get(self._vision_cache, key)
+        if vision_output is not None:
+            logger.debug("Vision analysis cache hit")
+            return vision_output
+
+        vision_output = await self._analyze_image(image)
+        await self._cache_put(self._vision_cache, key, vision_output)
 
-    def analyze_image_from_path(self, image_path: str) -> str:
+        return vision_output
+
+    async def analyze_image_from_path(self, image_path: str) -> str:
         """
         Analyze an image file using vision model.
 
@@ -66,23 +315,36 @@ class ImageAnalyzer:
         Returns:
             Vision model's analysis of the image
         """
-        print(f"Analyzing image with {self.vision_model}...")
+        return await self._analyze_image(image_path)
+
+    async def _analyze_image(self, image: Union[str, bytes]) -> str:
+        """
+        Run the vision model on an image.
+
+        Args:
+            image: Path to an image file, base64 encoded image or raw bytes
+
+        Returns:
+            Vision model's analysis of the image
+        """
+        logger.debug("Analyzing image with %s...", self.vision_model)
 
-        response = self.client.chat(
+        response = await self.client.chat(
             model=self.vision_model,
+            keep_alive=KEEP_ALIVE,
             messages=[
-                {"role": "user", "content": DESCRIBE_PROMPT, "images": [image_path]}
+                {"role": "user", "content": DESCRIBE_PROMPT, "images": [image]}
             ],
         )
 
         vision_output = response.message.content
-        print(f"Vision model response: {vision_output}")
+        logger.debug("Vision model response: %s", vision_output)
 
         return vision_output
 
-    def generate_audio_descriptions(
+    async def generate_audio_descriptions(
         self, vision_analysis: str, num_descriptions: int = 10
-    ) -> List[str]:
+    ) -> List[Tuple[str, str]]:
         """
         Generate audio descriptions from vision analysis.
 
@@ -91,132 +353,213 @@ class ImageAnalyzer:
             num_descriptions: Number of audio descriptions to generate
 
         Returns:
-            List of audio descriptions
-        """
-        print(f"Generating {num_descriptions} audio descriptions...")
-
-        prompt = f"""Based on this image analysis:
-
-        {vision_analysis}
-
-        Generate exactly {num_descriptions} highly distinct sound design samples. All samples MUST be coherent with the visual mood, colors, atmosphere, and emotional tone of the image.
-
-        FORMAT TO FOLLOW STRICTLY:
-
-        - 14 Loops
-        • Drones × 2
-            - (4 bars) sustained harmonic clusters
-            - (4 bars) single-note drones centered on one root note
-        • Piano melody × 1
-            - (4 bars) melodic piano phrase with emotional progression
-        • Textures × 5
-            - (2 bars) granular textures (transformed field recordings)
-            - (2 bars) organic noises (wind, friction, water, resonant metal)
-            - (2 bars) spatial ambiance (pink noise, synthetic wind, HF halos)
-            - (1 bar) microtextures moving across the spectrum (shimmers, crackles, sparkles)
-        • Low-end / rumbles × 2
-            - (2 bars) deep atmospheric sub-bass layers
-        • Pads × 3
-            - (2 bars) textured pads (granular, analog, modular)
-
-        - 3 Rhythmic Loops
-        • (1 bar) soft percussive clicks / tacs / glitch ticks
-        • (1 bar) low-frequency pulses (felt kick, sub pulses)
-        • (1 bar) slow modular shakers / grain sequences
-
-        - 4 One-shots
-        • (1/2 bar) soft impacts (wood, light metal, reverberant hits) ×2
-        • (1/2 bar) abstract percussive strike
-        • (1/2 bar) atmospheric pluck without sharp transient
-
-        RULES:
-        1. Use the categories above as structural templates but adapt to the image mood.
-        2. The prompts you generate must be very imaged and not technical - include colors, mood, ambiance, etc.
-        3. Be specific, realistic, and musically usable.
-        4. All {num_descriptions} samples must belong to different sub-types of the list above.
-        5. Output MUST be a Python list of {num_descriptions} items, each item a single-sentence description.
-        6. All notes must be in the same scale of notes (ex: C-minor, G-major, etc.)
-
-        Example of final format (structure only):
-        [
-            "Sample 1 description...",
-            "Sample 2 description...",
-            ...
-            "Sample {num_descriptions} description..."
-        ]"""
-
-        response = self.client.chat(
-            model=self.text_model,
-            messages=[{"role": "user", "content": prompt}],
-            format={
-                "type": "object",
-                "properties": {
-                    "descriptions": {
-                        "type": "array",
-                        "items": {"type": "string"},
-                        "minItems": num_descriptions,
-                        "maxItems": num_descriptions,
-                    }
-                },
-                "required": ["descriptions"],
-            },
-        )
+            List of tuples (description, category), where category is one of
+            the keys of CATEGORY_STEP_SCALE
+        """
+        return [
+            item
+            async for item in self.iter_audio_descriptions(vision_analysis, num_descriptions)
+        ]
 
-        descriptions_text = response.message.content.strip()
-        print(f"Descriptions response: {descriptions_text}")
+    async def iter_audio_descriptions(
+        self, vision_analysis: str, num_descriptions: int = 10
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Generate audio descriptions from vision analysis, yielding each one as
+        soon as the text model has finished writing it.
 
-        # Parse JSON
-        try:
-            response_data = json.loads(descriptions_text)
-
-            # Extract the descriptions array from the structured response
-            if isinstance(response_data, dict) and "descriptions" in response_data:
-                audio_descriptions = response_data["descriptions"]
-            elif isinstance(response_data, list):
-                # Fallback: handle if model returns raw array despite schema
-                audio_descriptions = response_data
-            else:
-                raise ValueError(
-                    "Response does not contain 'descriptions' key or is not a valid structure"
-                )
+        Args:
+            vision_analysis: The vision model's analysis of the image
+            num_descriptions: Number of audio descriptions to generate
+
+        Yields:
+            Tuples (description, category)
+
+        Raises:
+            ValueError: If the full reply is invalid, possibly after some
+                descriptions were already yielded
+        """
+        key = (vision_analysis, num_descriptions)
+
+        cached = await self._cache_get(self._descriptions_cache, key)
+        if cached is not None:
+            logger.debug("Audio descriptions cache hit")
+            for item in cached:
+                yield item
+            return
+
+        audio_descriptions = []
+        async for item in self._stream_audio_descriptions(vision_analysis, num_descriptions):
+            audio_descriptions.append(item)
+            yield item
+
+        await self._cache_put(self._descriptions_cache, key, audio_descriptions)
+
+    async def _stream_audio_descriptions(
+        self, vision_analysis: str, num_descriptions: int
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Stream audio descriptions of a vision analysis from the text model.
+
+        Args:
+            vision_analysis: The vision model's analysis of the image
+            num_descriptions: Number of audio descriptions to generate
+
+        Yields:
+            Tuples (description, category)
+        """
+        logger.debug("Generating %d audio descriptions...", num_descriptions)
 
-            # Validate it's a list
-            if not isinstance(audio_descriptions, list):
-                raise ValueError("Descriptions is not an array")
+        prompt = AUDIO_DESCRIPTIONS_PROMPT.format(
+            vision_analysis=vision_analysis, num_descriptions=num_descriptions
+        )
 
-            # Trim or pad to exact number (as safety net)
-            if len(audio_descriptions) > num_descriptions:
-                audio_descriptions = audio_descriptions[:num_descriptions]
-            elif len(audio_descriptions) < num_descriptions:
-                while len(audio_descriptions) < num_descriptions:
-                    audio_descriptions.append(
-                        f"Ambient sound variation {len(audio_descriptions) + 1}"
-                    )
+        response = await self.client.chat(
+            model=self.text_model,
+            keep_alive=KEEP_ALIVE,
+            messages=[{"role": "user", "content": prompt}],
+            format=_descriptions_format(num_descriptions),
+            # Caps decoding at roughly one short sentence per sample
+            options={"num_predict": 80 * num_descriptions, "temperature": 0.7},
+            stream=True,
+        )
 
-            return audio_descriptions
+        stream = _DescriptionStream()
+        chunks = []
+        yielded = 0
+
+        async for part in response:
+            chunks.append(part.message.content)
+            for item in stream.feed(part.message.content):
+                yielded += 1
+                yield item
+
+        descriptions_text = "".join(chunks).strip()
+        logger.debug("Descriptions response: %s", descriptions_text)
+
+        # Validate the whole reply; hand out anything the stream parser missed
+        audio_descriptions = _parse_descriptions(descriptions_text, num_descriptions)
+        for item in audio_descriptions[yielded:]:
+            yield item
+
+    def _cache_path(self, image_key: str) -> Optional[str]:
+        """Path of the persisted descriptions for an image, if enabled."""
+        if self.cache_dir is None:
+            return None
+        return os.path.join(self.cache_dir, f"{image_key}.json")
+
+    def _load_descriptions(
+        self, image_key: str, num_descriptions: int
+    ) -> Optional[List[Tuple[str, str]]]:
+        """Read persisted descriptions for an image, or None if missing or stale."""
+        path = self._cache_path(image_key)
+        if path is None:
+            return None
 
-        except (json.JSONDecodeError, ValueError) as e:
-            raise ValueError(f"Failed to parse audio descriptions: {str(e)}")
+        try:
+            with open(path, "rb") as f:
+                data = json_utils.loads(f.read())
+            audio_descriptions = [_parse_sample(item) for item in data["descriptions"]]
+        except (OSError, KeyError, TypeError, ValueError):
+            return None
+
+        if len(audio_descriptions) != num_descriptions:
+            return None
+        return audio_descriptions
 
-    def image_to_audio_descriptions(
-        self, image_base64: str, num_descriptions: int = 10
-    ) -> List[str]:
+    def _save_descriptions(
+        self, image_key: str, audio_descriptions: List[Tuple[str, str]]
+    ):
+        """Persist an image's descriptions; failures only cost a cache miss."""
+        path = self._cache_path(image_key)
+        if path is None:
+            return
+
+        data = {
+            "descriptions": [
+                {"description": description, "category": category}
+                for description, category in audio_descriptions
+            ]
+        }
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write then rename so a crash never leaves a truncated entry
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(json_utils.dumps(data))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Could not persist descriptions for %s: %s", image_key, e)
+
+    async def image_to_audio_descriptions(
+        self,
+        image_bytes: bytes,
+        num_descriptions: int = 10,
+        image_key: Optional[str] = None,
+    ) -> List[Tuple[str, str]]:
         """
         Complete pipeline: analyze image and generate audio descriptions.
 
         Args:
-            image_base64: Base64 encoded image
+            image_bytes: Raw image bytes, decoded once at request ingress
             num_descriptions: Number of audio descriptions to generate
+            image_key: image_hash() of the bytes, if already computed
 
         Returns:
-            List of audio descriptions
+            List of tuples (description, category)
         """
+        return [
+            item
+            async for item in self.iter_image_audio_descriptions(
+                image_bytes, num_descriptions, image_key
+            )
+        ]
+
+    async def iter_image_audio_descriptions(
+        self,
+        image_bytes: bytes,
+        num_descriptions: int = 10,
+        image_key: Optional[str] = None,
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Complete pipeline, yielding each audio description as soon as the
+        text model has written it so generation can start early.
+
+        Results are cached by image hash, in memory and in cache_dir, so a
+        resubmitted image skips both models.
+
+        Args:
+            image_bytes: Raw image bytes, decoded once at request ingress
+            num_descriptions: Number of audio descriptions to generate
+            image_key: image_hash() of the bytes, if already computed
+
+        Yields:
+            Tuples (description, category)
+        """
+        image_key = image_key or image_hash(image_bytes)
+        key = (image_key, num_descriptions)
+
+        audio_descriptions = await self._cache_get(self._image_cache, key)
+        if audio_descriptions is None:
+            audio_descriptions = await asyncio.to_thread(
+                self._load_descriptions, image_key, num_descriptions
+            )
+            if audio_descriptions is not None:
+                logger.debug("Persisted audio descriptions cache hit")
+                await self._cache_put(self._image_cache, key, audio_descriptions)
+        if audio_descriptions is not None:
+            for item in audio_descriptions:
+                yield item
+            return
+
         # Analyze image
-        vision_analysis = self.analyze_image_from_base64(image_base64)
+        vision_analysis = await self.analyze_image_from_bytes(image_bytes, image_key)
 
         # Generate audio descriptions
-        audio_descriptions = self.generate_audio_descriptions(
-            vision_analysis, num_descriptions
-        )
+        audio_descriptions = []
+        async for item in self.iter_audio_descriptions(vision_analysis, num_descriptions):
+            audio_descriptions.append(item)
+            yield item
 
-        return audio_descriptions
+        await self._cache_put(self._image_cache, key, audio_descriptions)
+        await asyncio.to_thread(self._save_descriptions, image_key, audio_descriptions)
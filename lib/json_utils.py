@@ -0,0 +1,47 @@
+"""JSON helpers backed by orjson."""
+from typing import Any, Union
+
+import orjson
+
+
+# Subclass of json.JSONDecodeError, so either can be caught
+JSONDecodeError = orjson.JSONDecodeError
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """
+    Parse a JSON document.
+
+    Args:
+        data: JSON text or UTF-8 bytes
+
+    Returns:
+        Parsed Python object
+    """
+    return orjson.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Serialize an object as compact JSON.
+
+    Args:
+        obj: JSON-serializable object
+
+    Returns:
+        UTF-8 encoded JSON without extra whitespace
+    """
+    return orjson.dumps(obj)
+
+
+def dumps_pretty(obj: Any) -> bytes:
+    """
+    Serialize an object as indented JSON.
+
+    Args:
+        obj: JSON-serializable object
+
+    Returns:
+        UTF-8 encoded JSON with two-space indentation
+    """
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
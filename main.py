@@ -1,30 +1,47 @@
-import json
 import os
 import tempfile
+import threading
 import zipfile
 import uuid
 import asyncio
-from contextlib import asynccontextmanager
-from datetime import datetime
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager, suppress
+from datetime import datetime, timedelta
 from enum import Enum
-from typing import Optional
-import threading
+from functools import lru_cache, partial
+from typing import List, Optional, Tuple
 
 import fastapi
+import torch
 import uvicorn
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, UploadFile
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import Base64Bytes, BaseModel
 
+from constants import CATEGORY_STEP_SCALE
+from lib import json_utils
 from lib.audio import AudioGenerator
-from lib.describe import ImageAnalyzer
+from lib.describe import ImageAnalyzer, image_hash
 import logging
 
 
+# Set LOG_LEVEL=WARNING in production to drop per-job progress logs
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger(__name__)
+
 # Initialize services
 audio_generator = AudioGenerator()
 image_analyzer = ImageAnalyzer()
 
+# Every TangoFlux call runs on this one thread: cudagraph-tree state is per
+# thread, so the compiled transformer would re-record (or trip torch's TLS
+# assertion) if calls hopped between pool threads
+model_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tangoflux")
+
 
 # Job status enum
 class JobStatus(str, Enum):
@@ -37,21 +54,167 @@ class JobStatus(str, Enum):
 
 # Job storage (in-memory - for production use Redis or a database)
 class Job:
-    def __init__(self, job_id: str, image_base64: str):
+    def __init__(self, job_id: str, image_bytes: bytes, image_hash: str):
         self.id = job_id
-        self.image_base64 = image_base64
+        self.image_bytes = image_bytes
+        self.image_hash = image_hash
         self.status = JobStatus.PENDING
         self.progress = 0
         self.current_step = ""
         self.created_at = datetime.now()
         self.completed_at: Optional[datetime] = None
-        self.zip_path: Optional[str] = None
+        self.zip_file: Optional[tempfile.SpooledTemporaryFile] = None
+        self.zip_size = 0
+        # Guards the shared file position across concurrent downloads
+        self.zip_lock = threading.Lock()
         self.error: Optional[str] = None
         self.samples_generated = 0
         self.total_samples = 10
+        # Replaced and set on every notify(), see job_events(). Jobs are
+        # created on the event loop, which owns the event.
+        self._loop = asyncio.get_running_loop()
+        self.changed = asyncio.Event()
 
+    def notify(self):
+        """Wake status stream subscribers. Safe to call from any thread."""
+        self._loop.call_soon_threadsafe(self._publish)
 
-jobs: dict[str, Job] = {}
+    def _publish(self):
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JobStatus.COMPLETED, JobStatus.FAILED)
+
+    def release(self):
+        """Free the job's ZIP and image once it is no longer reachable."""
+        self.image_bytes = b""
+        with self.zip_lock:
+            if self.zip_file is not None:
+                self.zip_file.close()
+                self.zip_file = None
+
+
+class JobStore:
+    """
+    Bounded, expiring job registry. Past `maxsize`, the oldest finished jobs
+    are dropped; jobs older than `ttl` seconds are dropped on lookup and by
+    expire(). Dropped jobs have their ZIP closed.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600):
+        self.maxsize = maxsize
+        self.ttl = timedelta(seconds=ttl)
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, job: Job):
+        with self._lock:
+            self._jobs[job.id] = job
+            if len(self._jobs) > self.maxsize:
+                # Never drop a job that is still queued or running
+                for job_id in [job_id for job_id, old in self._jobs.items() if old.finished]:
+                    if len(self._jobs) <= self.maxsize:
+                        break
+                    self._jobs.pop(job_id).release()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.finished and datetime.now() - job.created_at > self.ttl:
+                del self._jobs[job_id]
+                job.release()
+                return None
+            return job
+
+    def expire(self, retention: float) -> int:
+        """
+        Drop finished jobs completed more than `retention` seconds ago, and
+        any finished job past the TTL.
+
+        Returns:
+            Number of jobs dropped
+        """
+        now = datetime.now()
+        retention = timedelta(seconds=retention)
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.finished and (
+                    now - job.created_at > self.ttl
+                    or now - (job.completed_at or job.created_at) > retention
+                )
+            ]
+            for job_id in expired:
+                self._jobs.pop(job_id).release()
+        return len(expired)
+
+
+jobs = JobStore(maxsize=1024, ttl=3600)
+
+# Finished jobs (and their ZIPs) are dropped this long after completion
+JOB_RETENTION = 10 * 60
+JANITOR_INTERVAL = 60
+
+# Generated samples keyed by (image hash, index, description), so a
+# resubmitted image only pays for packaging. Roughly 3.5 MB per sample.
+SAMPLE_CACHE_SIZE = 50
+sample_cache: OrderedDict[tuple, "torch.Tensor"] = OrderedDict()
+
+# ZIPs stay in memory up to this size, then spill to a temporary file
+ZIP_SPOOL_SIZE = int(os.getenv("ZIP_SPOOL_SIZE", 128 * 1024 * 1024))
+
+# Generation starts once this many of a job's descriptions have streamed in;
+# the rest are generated in a second round
+EARLY_SAMPLES = 5
+
+# Jobs queued within this many seconds of each other share sampler runs
+JOB_FUSION_WINDOW = 0.5
+MAX_FUSED_JOBS = 4
+
+
+def sample_steps(category: str, steps: int = 30) -> int:
+    """
+    Scale the pack's diffusion step count by the sample's category.
+    """
+    return max(1, round(steps * CATEGORY_STEP_SCALE[category]))
+
+
+@lru_cache(maxsize=None)
+def sample_filenames(count: int) -> Tuple[str, ...]:
+    """
+    ZIP entry names for a pack of `count` samples, formatted once per size.
+    """
+    return tuple(f"sample_{i:02d}.wav" for i in range(1, count + 1))
+
+
+def get_cached_sample(key: tuple) -> Optional["torch.Tensor"]:
+    """Return a cached sample and mark it as recently used, or None."""
+    if key not in sample_cache:
+        return None
+    sample_cache.move_to_end(key)
+    return sample_cache[key]
+
+
+def cache_sample(key: tuple, audio_tensor: "torch.Tensor"):
+    """Cache a sample, evicting the least recently used one when full."""
+    sample_cache[key] = audio_tensor
+    sample_cache.move_to_end(key)
+    if len(sample_cache) > SAMPLE_CACHE_SIZE:
+        sample_cache.popitem(last=False)
+
+
+async def run_model(fn, *args, **kwargs):
+    """Run a blocking TangoFlux call on the dedicated model thread."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(model_executor, partial(fn, *args, **kwargs))
+
+
+def load_audio_model():
+    """Load TangoFlux and compile/warm up its sampler."""
+    audio_generator.load_model()
+    audio_generator.warmup_sampler()
 
 
 @asynccontextmanager
@@ -60,19 +223,47 @@ async def lifespan(app: FastAPI):
     Lifespan context manager for startup and shutdown events.
     Load models on startup and cleanup on shutdown.
     """
-    # Startup: Load models
-    print("Starting up: Loading models...")
-    audio_generator.load_model()
+    # Let any remaining fp32 matmuls (e.g. the T5 text encoder) use TF32
+    torch.backends.cuda.matmul.allow_tf32 = True
+    torch.backends.cudnn.allow_tf32 = True
+    torch.set_float32_matmul_precision("high")
+
+    # Startup: Load TangoFlux and warm up Ollama concurrently
+    logger.info("Starting up: Loading models...")
+    await asyncio.gather(
+        run_model(load_audio_model),
+        image_analyzer.warmup(),
+    )
+
+    # One worker consumes the job queue; WAV encoding and ZIP packaging run
+    # off the loop, encoding overlapped with sampling
+    app.state.job_queue = asyncio.Queue()
+    app.state.encode_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="encode")
+    app.state.zip_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="zip")
+    worker = asyncio.create_task(worker_loop(
+        app.state.job_queue, app.state.encode_executor, app.state.zip_executor
+    ))
+    janitor = asyncio.create_task(janitor_loop())
+
     yield
     # Shutdown: Cleanup resources if needed
-    print("Shutting down: Cleaning up resources...")
+    logger.info("Shutting down: Cleaning up resources...")
+    for task in (worker, janitor):
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    app.state.encode_executor.shutdown()
+    app.state.zip_executor.shutdown()
+    audio_generator.close()
+    model_executor.shutdown()
 
 
 app = fastapi.FastAPI(lifespan=lifespan)
 
 
 class ImageRequest(BaseModel):
-    image_base64: str
+    # Decoded once by pydantic at the request boundary; invalid base64 is a 422
+    image_base64: Base64Bytes
 
 
 class JobResponse(BaseModel):
@@ -91,97 +282,329 @@ class JobStatusResponse(BaseModel):
     error: Optional[str] = None
 
 
-def process_sample_pack(job_id: str):
+def fail_job(job: Job, error: Exception):
+    """Mark a job as failed with the given error."""
+    logger.error("[Job %s] Error: %s", job.id, error, exc_info=error)
+    job.status = JobStatus.FAILED
+    job.error = str(error)
+    job.current_step = "Failed"
+    job.completed_at = datetime.now()
+    job.notify()
+
+
+class PackBuild:
+    """A job's descriptions as they stream in, and its samples' encodes."""
+
+    def __init__(self, job: Job):
+        self.job = job
+        self.descriptions: List[Tuple[str, str]] = []
+        # One encode future per description, once it has been scheduled
+        self.wavs: List[Future] = []
+        # Samples finished in earlier generation rounds
+        self.generated = 0
+        # Set when the description stream is exhausted or failed
+        self.described = False
+        self.arrived = asyncio.Event()
+
+    async def wait_for_descriptions(self, count: Optional[int] = None):
+        """Wait until `count` descriptions (all if None) have arrived."""
+        while not self.described and (count is None or len(self.descriptions) < count):
+            self.arrived.clear()
+            await self.arrived.wait()
+
+
+async def describe_job(build: PackBuild):
     """
-    Background task to process sample pack generation.
-    Updates job status as it progresses.
+    Analyze a job's artwork and stream its (description, category) pairs
+    into `build` as the text model writes them.
     """
-    job = jobs.get(job_id)
-    if not job:
-        return
+    job = build.job
+    logger.info("[Job %s] Starting sample pack generation", job.id)
 
-    try:
-        logging.info(f"[Job {job_id}] Starting sample pack generation")
+    # Step 1: Analyze image
+    job.status = JobStatus.ANALYZING
+    job.current_step = "Analyzing artwork with AI..."
+    job.progress = 5
+    job.notify()
 
-        # Step 1: Analyze image
-        job.status = JobStatus.ANALYZING
-        job.current_step = "Analyzing artwork with AI..."
-        job.progress = 5
-        logging.info(f"[Job {job_id}] Analyzing image")
-
-        audio_descriptions = image_analyzer.image_to_audio_descriptions(
-            job.image_base64,
-            num_descriptions=10
-        )
-        logging.info(f"[Job {job_id}] Generated {len(audio_descriptions)} audio descriptions")
-
-        job.progress = 15
-        job.current_step = "Generating audio samples..."
-
-        # Step 2: Generate audio samples
-        job.status = JobStatus.GENERATING
-        temp_audio_dir = tempfile.mkdtemp()
-        logging.debug(f"[Job {job_id}] Created temporary directory: {temp_audio_dir}")
-
-        # Generate samples one by one to update progress
-        audio_files = []
-        for idx, description in enumerate(audio_descriptions, 1):
-            job.current_step = f"Generating sample {idx}/{len(audio_descriptions)}..."
-            job.samples_generated = idx - 1
-            # Progress from 15% to 90% during generation
-            job.progress = 15 + int((idx - 1) / len(audio_descriptions) * 75)
-
-            logging.info(f"[Job {job_id}] Generating sample {idx}: {description[:50]}...")
-
-            audio_tensor = audio_generator.generate_audio(
-                description=description,
-                steps=30,
-                duration=10
-            )
-            audio_path = os.path.join(temp_audio_dir, f"sample_{idx:02d}.wav")
-            audio_generator.save_audio(audio_tensor, audio_path)
-            audio_files.append((audio_path, description))
-            job.samples_generated = idx
+    try:
+        async for item in image_analyzer.iter_image_audio_descriptions(
+            job.image_bytes,
+            num_descriptions=job.total_samples,
+            image_key=job.image_hash
+        ):
+            if not build.descriptions:
+                job.status = JobStatus.GENERATING
+                job.progress = 15
+                job.current_step = "Generating audio samples..."
+                job.notify()
+            build.descriptions.append(item)
+            build.arrived.set()
+    except Exception as e:
+        fail_job(job, e)
+    else:
+        logger.info("[Job %s] Generated %d audio descriptions", job.id, len(build.descriptions))
+    finally:
+        build.described = True
+        build.arrived.set()
 
-        logging.info(f"[Job {job_id}] Generated {len(audio_files)} audio files")
 
-        # Step 3: Create ZIP file
+def build_sample_pack(
+    job: Job, audio_descriptions: List[Tuple[str, str]], wavs: List[bytes]
+) -> tempfile.SpooledTemporaryFile:
+    """
+    Write a job's encoded samples and metadata into a spooled (in-memory) ZIP.
+    """
+    filenames = sample_filenames(len(audio_descriptions))
+    # Large write buffer in case the pack spills to disk
+    zip_file = tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_SIZE, buffering=1 << 20)
+    samples = []
+
+    # WAV PCM does not deflate meaningfully, so entries are stored as-is.
+    # Packs are a few tens of MB, far under the 4 GiB that needs ZIP64.
+    with zipfile.ZipFile(
+        zip_file, 'w', compression=zipfile.ZIP_STORED, allowZip64=False
+    ) as zipf:
+        for filename, (description, category), wav_bytes in zip(
+            filenames, audio_descriptions, wavs
+        ):
+            zipf.writestr(filename, wav_bytes)
+            samples.append({
+                "filename": filename,
+                "description": description,
+                "category": category
+            })
+
+        logger.info("[Job %s] Generated %d audio files", job.id, len(samples))
+
+        # Step 3: Add metadata to the ZIP
         job.current_step = "Packaging samples..."
         job.progress = 92
-        logging.info(f"[Job {job_id}] Creating ZIP file")
-
-        zip_path = os.path.join(temp_audio_dir, "sample_pack.zip")
-        with zipfile.ZipFile(zip_path, 'w') as zipf:
-            for audio_path, description in audio_files:
-                zipf.write(audio_path, os.path.basename(audio_path))
-
-            metadata = {
-                "samples": [
-                    {
-                        "filename": f"sample_{idx:02d}.wav",
-                        "description": desc
-                    }
-                    for idx, (_, desc) in enumerate(audio_files, 1)
-                ]
-            }
-            metadata_path = os.path.join(temp_audio_dir, "metadata.json")
-            with open(metadata_path, 'w') as f:
-                json.dump(metadata, f, indent=2)
-            zipf.write(metadata_path, "metadata.json")
-
-        # Mark as completed
-        job.status = JobStatus.COMPLETED
-        job.progress = 100
-        job.current_step = "Complete!"
-        job.zip_path = zip_path
-        job.completed_at = datetime.now()
-        logging.info(f"[Job {job_id}] Sample pack generated successfully!")
+        job.notify()
+
+        metadata = {"samples": samples}
+        zipf.writestr("metadata.json", json_utils.dumps_pretty(metadata))
+
+    return zip_file
+
 
+async def generate_round(builds: List[PackBuild], encode_executor: ThreadPoolExecutor):
+    """
+    Generate every description that has arrived since the last round, for
+    all live jobs, in batched sampler runs. WAV encoding runs on
+    encode_executor while later sub-batches sample.
+    """
+    builds = [build for build in builds if not build.job.finished]
+
+    pending = []
+    descriptions = []
+    steps = []
+    for build in builds:
+        job = build.job
+        for idx in range(len(build.wavs), len(build.descriptions)):
+            description, category = build.descriptions[idx]
+            key = (job.image_hash, idx, description)
+            audio_tensor = get_cached_sample(key)
+            if audio_tensor is None:
+                build.wavs.append(None)
+                pending.append((build, idx, key))
+                descriptions.append(description)
+                steps.append(sample_steps(category))
+            else:
+                build.wavs.append(encode_executor.submit(audio_generator.encode_wav, audio_tensor))
+                build.generated += 1
+
+    if not descriptions:
+        return
+
+    round_samples = {build.job.id: 0 for build in builds}
+    for build, _, _ in pending:
+        round_samples[build.job.id] += 1
+
+    def on_progress(done: int, total: int):
+        # Called from the generation thread after every denoising step
+        fraction = done / total
+        for build in builds:
+            job = build.job
+            if job.finished:
+                # Failed mid-round (e.g. its description stream broke)
+                continue
+            generated = build.generated + fraction * round_samples[job.id]
+            job.samples_generated = int(generated)
+            job.current_step = f"Generating samples ({int(generated / job.total_samples * 100)}%)..."
+            # Progress from 15% to 90% during generation; only push whole-%
+            # changes to status streams
+            progress = 15 + int(generated / job.total_samples * 75)
+            if progress != job.progress:
+                job.progress = progress
+                job.notify()
+
+    encodes = []
+    generated = []
+
+    def on_sample(i: int, audio_tensor):
+        # Called from the generation thread as each sample is decoded; the
+        # tensor is a view into the generator's reused output buffer
+        build, idx, key = pending[i]
+        if build.job.finished:
+            return
+        build.wavs[idx] = encode_executor.submit(audio_generator.encode_wav, audio_tensor)
+        encodes.append(build.wavs[idx])
+        generated.append((key, audio_tensor.clone()))
+
+    logger.info("Generating %d samples for %d job(s)", len(descriptions), len(builds))
+
+    try:
+        await run_model(
+            audio_generator.generate_audio_batch,
+            descriptions,
+            steps=steps,
+            duration=10,
+            progress_callback=on_progress,
+            sample_callback=on_sample
+        )
     except Exception as e:
-        logging.error(f"[Job {job_id}] Error: {str(e)}", exc_info=True)
-        job.status = JobStatus.FAILED
-        job.error = str(e)
-        job.current_step = "Failed"
+        for build in builds:
+            fail_job(build.job, e)
+        return
+
+    for build in builds:
+        build.generated += round_samples[build.job.id]
+    for key, audio_tensor in generated:
+        cache_sample(key, audio_tensor)
+
+    # Encodes read the generator's output buffer, so they must finish before
+    # the next round samples into it
+    if encodes:
+        await asyncio.wait([asyncio.wrap_future(encode) for encode in encodes])
+
+
+async def process_job_batch(
+    batch: List[Job],
+    encode_executor: ThreadPoolExecutor,
+    zip_executor: ThreadPoolExecutor
+):
+    """
+    Generate the sample packs for several queued jobs with shared sampler runs.
+    Updates job status as it progresses. Blocking model calls run on the
+    model thread so the event loop keeps serving status requests.
+    """
+    builds = [PackBuild(job) for job in batch]
+    describing = [asyncio.create_task(describe_job(build)) for build in builds]
+
+    try:
+        # Warm up the TangoFlux sampler while the vision model is running
+        try:
+            await run_model(audio_generator.warmup_sampler)
+        except Exception as e:
+            logger.warning("Sampler warm-up failed: %s", e)
+
+        # Step 2: The first round starts on each job's first descriptions
+        # while the text model is still writing the rest; the second round
+        # generates everything else
+        for count in (EARLY_SAMPLES, None):
+            await asyncio.gather(*(build.wait_for_descriptions(count) for build in builds))
+            await generate_round(builds, encode_executor)
+    finally:
+        for task in describing:
+            task.cancel()
+
+    loop = asyncio.get_running_loop()
+    for build in builds:
+        job = build.job
+        if job.finished:
+            continue
+
+        job.samples_generated = len(build.descriptions)
+        try:
+            wavs = await asyncio.gather(*map(asyncio.wrap_future, build.wavs))
+            zip_file = await loop.run_in_executor(
+                zip_executor, build_sample_pack, job, build.descriptions, wavs
+            )
+        except Exception as e:
+            fail_job(job, e)
+        else:
+            # Mark as completed
+            job.status = JobStatus.COMPLETED
+            job.progress = 100
+            job.current_step = "Complete!"
+            job.zip_size = zip_file.tell()
+            job.zip_file = zip_file
+            job.completed_at = datetime.now()
+            job.notify()
+            logger.info("[Job %s] Sample pack generated successfully!", job.id)
+
+
+async def next_job_batch(queue: asyncio.Queue) -> List[Job]:
+    """
+    Wait for a queued job, then collect any more arriving within the fusion
+    window (up to MAX_FUSED_JOBS) so they share sampler runs.
+    """
+    batch = [await queue.get()]
+    deadline = asyncio.get_running_loop().time() + JOB_FUSION_WINDOW
+
+    while len(batch) < MAX_FUSED_JOBS:
+        timeout = deadline - asyncio.get_running_loop().time()
+        if timeout <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(queue.get(), timeout))
+        except asyncio.TimeoutError:
+            break
+
+    return batch
+
+
+async def janitor_loop():
+    """Periodically drop expired jobs so their ZIPs don't pile up in memory."""
+    while True:
+        await asyncio.sleep(JANITOR_INTERVAL)
+        expired = jobs.expire(JOB_RETENTION)
+        if expired:
+            logger.info("Expired %d finished job(s)", expired)
+
+
+async def worker_loop(
+    queue: asyncio.Queue,
+    encode_executor: ThreadPoolExecutor,
+    zip_executor: ThreadPoolExecutor
+):
+    """
+    Single consumer of the job queue, so only one batch uses the GPU at a time.
+    """
+    while True:
+        batch = await next_job_batch(queue)
+        try:
+            await process_job_batch(batch, encode_executor, zip_executor)
+        except Exception as e:
+            for job in batch:
+                if not job.finished:
+                    fail_job(job, e)
+        finally:
+            for _ in batch:
+                queue.task_done()
+
+        if queue.empty():
+            # Idle: hand cached VRAM back until the next job arrives. A
+            # failure here must not take down the only queue consumer.
+            try:
+                await run_model(audio_generator.release_cached_memory)
+            except Exception as e:
+                logger.warning("Releasing cached GPU memory failed: %s", e)
+
+
+def iter_zip(job: Job, chunk_size: int = 1 << 20):
+    """
+    Yield a job's ZIP in chunks for a streaming response.
+    """
+    for offset in range(0, job.zip_size, chunk_size):
+        with job.zip_lock:
+            if job.zip_file is None:
+                # Expired mid-download
+                return
+            job.zip_file.seek(offset)
+            chunk = job.zip_file.read(chunk_size)
+        yield chunk
 
 
 @app.get("/")
@@ -194,21 +617,24 @@ def get_audio():
     return FileResponse("output.wav")
 
 
-@app.post("/sample", status_code=202, response_model=JobResponse)
-async def create_sample_pack_job(request: ImageRequest, background_tasks: BackgroundTasks):
+async def enqueue_job(image_bytes: bytes) -> JobResponse:
     """
-    Start a sample pack generation job.
-    Returns immediately with a job_id that can be used to check status.
+    Register a job for an uploaded image and queue it for generation.
     """
+    if not image_bytes:
+        raise HTTPException(status_code=400, detail="Empty image upload")
+
     job_id = str(uuid.uuid4())
-    job = Job(job_id, request.image_base64)
-    jobs[job_id] = job
+    # Hashed once here to key the description and sample caches
+    job = Job(job_id, image_bytes, image_hash(image_bytes))
+    jobs.add(job)
 
-    logging.info(f"Created job {job_id}")
+    logger.info("Created job %s", job_id)
 
-    # Start processing in background thread (not async to avoid blocking)
-    thread = threading.Thread(target=process_sample_pack, args=(job_id,))
-    thread.start()
+    # Picked up by worker_loop, possibly together with other queued jobs
+    job.current_step = "Queued..."
+    job.notify()
+    await app.state.job_queue.put(job)
 
     return JobResponse(
         job_id=job_id,
@@ -217,15 +643,28 @@ async def create_sample_pack_job(request: ImageRequest, background_tasks: Backgr
     )
 
 
-@app.get("/sample/{job_id}", response_model=JobStatusResponse)
-async def get_job_status(job_id: str):
+@app.post("/sample", status_code=202, response_model=JobResponse)
+async def create_sample_pack_job(file: UploadFile):
     """
-    Get the status of a sample pack generation job.
+    Start a sample pack generation job from a multipart image upload.
+    Returns immediately with a job_id that can be used to check status.
     """
-    job = jobs.get(job_id)
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
+    return await enqueue_job(await file.read())
+
 
+@app.post("/sample/base64", status_code=202, response_model=JobResponse, deprecated=True)
+async def create_sample_pack_job_base64(request: ImageRequest):
+    """
+    Start a sample pack generation job from a base64 JSON body.
+    Deprecated: upload the file to POST /sample instead, which avoids the
+    base64 size overhead.
+    """
+    # Already decoded by pydantic
+    return await enqueue_job(request.image_base64)
+
+
+def job_status(job: Job) -> JobStatusResponse:
+    """Snapshot a job's progress for the status endpoints."""
     return JobStatusResponse(
         job_id=job.id,
         status=job.status.value,
@@ -237,6 +676,53 @@ async def get_job_status(job_id: str):
     )
 
 
+async def job_events(job: Job):
+    """
+    Yield a server-sent event with the job's status now and after every
+    change, until the job completes or fails.
+    """
+    while True:
+        # Take the event before the snapshot so no change can be missed
+        changed = job.changed
+        yield f"data: {job_status(job).model_dump_json()}\n\n"
+        if job.finished:
+            return
+        await changed.wait()
+
+
+@app.get("/sample/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(job_id: str):
+    """
+    Get the status of a sample pack generation job.
+    """
+    job = jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return job_status(job)
+
+
+@app.get("/sample/{job_id}/stream")
+async def stream_job_status(job_id: str):
+    """
+    Stream the status of a sample pack generation job as server-sent events,
+    pushed on every change instead of polled.
+    """
+    job = jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return StreamingResponse(
+        job_events(job),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Keep reverse proxies from buffering the stream
+            "X-Accel-Buffering": "no",
+        }
+    )
+
+
 @app.get("/sample/{job_id}/download")
 async def download_sample_pack(job_id: str):
     """
@@ -252,15 +738,27 @@ async def download_sample_pack(job_id: str):
             detail=f"Job is not completed. Current status: {job.status.value}"
         )
 
-    if not job.zip_path or not os.path.exists(job.zip_path):
+    if job.zip_file is None:
         raise HTTPException(status_code=404, detail="Sample pack file not found")
 
-    return FileResponse(
-        job.zip_path,
+    return StreamingResponse(
+        iter_zip(job),
         media_type="application/zip",
-        filename="sample_pack.zip"
+        headers={
+            "Content-Disposition": 'attachment; filename="sample_pack.zip"',
+            "Content-Length": str(job.zip_size),
+        }
     )
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # uvloop and httptools come with uvicorn[standard]. One worker: the GPU
+    # and the job registry are per-process.
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=1
+    )
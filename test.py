@@ -1,14 +1,10 @@
 import requests
-import base64
 
-# Lire une image
+# Envoyer l'image en multipart
 with open("image.jpg", "rb") as f:
-    image_base64 = base64.b64encode(f.read()).decode()
-
-# Appeler l'API
-response = requests.post(
-    "http://localhost:8000/sample", json={"image_base64": image_base64}
-)
+    response = requests.post(
+        "http://localhost:8000/sample", files={"file": ("image.jpg", f, "image/jpeg")}
+    )
 
 # Sauvegarder le ZIP
 with open("sample_pack.zip", "wb") as f: